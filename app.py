@@ -6,13 +6,20 @@ import subprocess
 import json
 import logging
 import sys
+import time
 import hmac
 import hashlib
+import queue
+import select
+import shutil
+import threading
 from pathlib import Path
-from functools import wraps
-from flask import Flask, request, jsonify, send_file, render_template
-from werkzeug.exceptions import BadRequest, InternalServerError, Unauthorized
-import uuid
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+from typing import Any, Dict, List, Optional, Union
+import msgspec
+from flask import Flask, Response, request, jsonify, render_template
+from werkzeug.exceptions import BadRequest, InternalServerError, RequestEntityTooLarge, Unauthorized
 
 # Configure logging
 logging.basicConfig(
@@ -26,73 +33,93 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Reject oversized request bodies before they are read or parsed
+app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB
+
 # Security headers
-@app.after_request
-def add_security_headers(response):
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    # Remove server header for security
-    response.headers.pop('Server', None)
-    return response
+SECURITY_HEADERS = [
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Referrer-Policy', 'strict-origin-when-cross-origin'),
+]
+# Headers replaced by SECURITY_HEADERS, plus the server header for security
+_STRIPPED_HEADERS = frozenset(['server'] + [name.lower() for name, _ in SECURITY_HEADERS])
+
+class SecurityHeadersMiddleware:
+    """WSGI middleware that adds security headers to every response.
+    
+    Rewrites the header list in a single pass in start_response, instead
+    of an after_request callback on each request.
+    """
+    
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+    
+    def __call__(self, environ, start_response):
+        def secure_start_response(status, headers, exc_info=None):
+            headers = [header for header in headers if header[0].lower() not in _STRIPPED_HEADERS]
+            headers.extend(SECURITY_HEADERS)
+            return start_response(status, headers, exc_info)
+        return self.wsgi_app(environ, secure_start_response)
+
+app.wsgi_app = SecurityHeadersMiddleware(app.wsgi_app)
 
 # Authentication configuration
-VALID_API_KEYS = set()
+VALID_API_KEYS = frozenset()
+VALID_KEY_DIGESTS = frozenset()
 DEVELOPMENT_MODE = False
 
-def secure_compare_api_key(provided_key, valid_key):
-    """Securely compare API keys using constant-time comparison to prevent timing attacks."""
-    if not isinstance(provided_key, str) or not isinstance(valid_key, str):
-        return False
-    
-    # Convert to bytes for HMAC comparison
-    provided_bytes = provided_key.encode('utf-8')
-    valid_bytes = valid_key.encode('utf-8')
-    
-    # Use HMAC for constant-time comparison
-    return hmac.compare_digest(provided_bytes, valid_bytes)
+def api_key_digest(key):
+    """Fixed-length SHA-256 digest of an API key."""
+    return hashlib.sha256(key.encode('utf-8')).digest()
 
 def is_valid_api_key(provided_key):
     """Check if provided API key is valid using secure comparison."""
-    if not provided_key:
+    if not provided_key or not isinstance(provided_key, str):
         return False
     
-    # Compare against all valid keys using secure comparison
-    for valid_key in VALID_API_KEYS:
-        if secure_compare_api_key(provided_key, valid_key):
-            return True
-    
-    return False
+    # Digests are fixed-length, so neither the lookup nor the comparison
+    # leaks the length of the configured keys
+    digest = api_key_digest(provided_key)
+    if len(VALID_KEY_DIGESTS) == 1:
+        return hmac.compare_digest(digest, next(iter(VALID_KEY_DIGESTS)))
+    return digest in VALID_KEY_DIGESTS
 
 def load_api_keys():
     """Load API keys from environment variables."""
-    global VALID_API_KEYS, DEVELOPMENT_MODE
+    global VALID_API_KEYS, VALID_KEY_DIGESTS, DEVELOPMENT_MODE
     
     # Check for explicit development mode
     DEVELOPMENT_MODE = os.getenv('DEVELOPMENT_MODE', '').lower() in ('true', '1', 'yes', 'on')
     
+    valid_keys = set()
+    
     # Load from comma-separated environment variable
     api_keys_env = os.getenv('API_KEYS', '')
     if api_keys_env:
         keys = [key.strip() for key in api_keys_env.split(',') if key.strip()]
-        VALID_API_KEYS.update(keys)
-        logger.info(f"Loaded {len(keys)} API keys from API_KEYS environment variable")
+        valid_keys.update(keys)
+        logger.info("Loaded %s API keys from API_KEYS environment variable", len(keys))
     
     # Load from individual environment variables (API_KEY_1, API_KEY_2, etc.)
     individual_keys = 0
     for key, value in os.environ.items():
         if key.startswith('API_KEY_') and value:
-            VALID_API_KEYS.add(value.strip())
+            valid_keys.add(value.strip())
             individual_keys += 1
     
     if individual_keys > 0:
-        logger.info(f"Loaded {individual_keys} additional API keys from individual environment variables")
+        logger.info("Loaded %s additional API keys from individual environment variables", individual_keys)
+    
+    # Keys are fixed after startup
+    VALID_API_KEYS = frozenset(valid_keys)
+    VALID_KEY_DIGESTS = frozenset(api_key_digest(key) for key in VALID_API_KEYS)
     
     # Security: Validate API key strength
-    weak_keys = [key for key in VALID_API_KEYS if len(key) < 16]
+    weak_keys = sum(1 for key in VALID_API_KEYS if len(key) < 16)
     if weak_keys:
-        logger.warning(f"Found {len(weak_keys)} API keys shorter than 16 characters - consider using stronger keys")
+        logger.warning("Found %s API keys shorter than 16 characters - consider using stronger keys", weak_keys)
     
     # Production security: Require API keys unless explicitly in development mode
     if not VALID_API_KEYS and not DEVELOPMENT_MODE:
@@ -107,7 +134,7 @@ def load_api_keys():
         if VALID_API_KEYS:
             logger.warning("API keys configured but ignored in development mode")
     elif VALID_API_KEYS:
-        logger.info(f"Production mode: Authentication enabled with {len(VALID_API_KEYS)} API key(s)")
+        logger.info("Production mode: Authentication enabled with %s API key(s)", len(VALID_API_KEYS))
 
 def require_api_key(f):
     """Decorator to require API key authentication."""
@@ -124,7 +151,7 @@ def require_api_key(f):
         # Production mode: require valid API key
         api_key = request.headers.get('X-API-Key')
         if not api_key or not is_valid_api_key(api_key):
-            logger.warning(f"Unauthorized access attempt from {request.remote_addr} to {request.endpoint}")
+            logger.warning("Unauthorized access attempt from %s to %s", request.remote_addr, request.endpoint)
             raise Unauthorized("Valid API key required. Include 'X-API-Key' header.")
         
         return f(*args, **kwargs)
@@ -133,12 +160,300 @@ def require_api_key(f):
 # Load API keys on startup
 load_api_keys()
 
+# Resolved once so spawning chordpro skips the PATH lookup. An absolute
+# executable path is also one of the conditions for CPython to spawn
+# children with posix_spawn instead of fork+exec.
+CHORDPRO_BIN = shutil.which('chordpro') or 'chordpro'
+PERL_BIN = shutil.which('perl')
+
+class ConvertOptions(msgspec.Struct):
+    """ChordPro CLI options accepted by /convert (see /options)."""
+    transpose: Optional[int] = None
+    meta: Optional[Dict[str, Any]] = None
+    diagrams: Optional[bool] = None
+    config: Union[str, List[str], None] = None
+
+class ConvertRequest(msgspec.Struct):
+    """Request body for /convert."""
+    content: str
+    output_format: str = 'pdf'
+    options: ConvertOptions = msgspec.field(default_factory=ConvertOptions)
+
+DEFAULT_OPTIONS = ConvertOptions()
+
+# Parses and validates a /convert body in a single pass
+convert_request_decoder = msgspec.json.Decoder(ConvertRequest)
+
+# Only short config strings are memoized; maxsize bounds the number of
+# entries, not their size
+SPLIT_CONFIGS_CACHE_MAX_LENGTH = 256
+
+def _split_configs(config_value):
+    return tuple(c.strip() for c in config_value.split(','))
+
+_split_configs_cached = lru_cache(maxsize=256)(_split_configs)
+
+def split_configs(config_value):
+    """Split a comma-separated config string like "ukulele,modern3"."""
+    if len(config_value) > SPLIT_CONFIGS_CACHE_MAX_LENGTH:
+        return _split_configs(config_value)
+    return _split_configs_cached(config_value)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chordpro-worker.pl')
+
+def is_perl_script(path):
+    """Check whether path is a Perl script the pool workers can run in-process."""
+    try:
+        with open(path, 'rb') as f:
+            first_line = f.readline(256)
+    except OSError:
+        return False
+    return first_line.startswith(b'#!') and b'perl' in first_line
+
+def spawn(cmd, **kwargs):
+    """
+    Start a child process, on CPython's posix_spawn fast path where possible.
+    
+    posix_spawn (vfork-backed on Linux) needs an absolute executable and no
+    preexec_fn/cwd; unlike fork it does not copy the worker's page tables.
+    close_fds stays on: gunicorn marks its listening socket inheritable, so
+    children must not keep it open. Python 3.13+ still uses posix_spawn with
+    close_fds=True where the C library supports closefrom file actions.
+    """
+    return subprocess.Popen(cmd, close_fds=True, **kwargs)
+
+def run_command(cmd, **kwargs):
+    """subprocess.run() counterpart of spawn()."""
+    return subprocess.run(cmd, close_fds=True, **kwargs)
+
+class ChordProWorker:
+    """A pre-spawned ChordPro process that runs jobs sent over its stdin."""
+    
+    def __init__(self, cmd, env=None):
+        self.proc = spawn(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        self._stdin_fd = self.proc.stdin.fileno()
+        self._fd = self.proc.stdout.fileno()
+        self._buffer = bytearray()
+    
+    def alive(self):
+        return self.proc.poll() is None
+    
+    def run(self, argv, input=b'', timeout=None):
+        """
+        Run one ChordPro job on this worker.
+        
+        Mirrors subprocess.run(argv, input=input, capture_output=True):
+        returns a CompletedProcess with bytes stdout/stderr, and raises
+        subprocess.TimeoutExpired if the job does not finish in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        header = json.dumps({"argv": list(argv), "input": len(input)}).encode('utf-8') + b'\n'
+        self._write([header, input], argv, timeout, deadline)
+        
+        reply = json.loads(self._read_line(argv, timeout, deadline))
+        stdout = self._read_exact(reply['stdout'], argv, timeout, deadline)
+        stderr = self._read_exact(reply['stderr'], argv, timeout, deadline)
+        return subprocess.CompletedProcess(argv, reply['rc'], stdout, stderr)
+    
+    def close(self):
+        """Stop the worker and any job it is still running."""
+        if self.alive():
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+    
+    def _wait(self, readable, argv, timeout, deadline):
+        # Under gevent the pipes are non-blocking, so always wait for the fd
+        # before reading or writing (gevent makes the select cooperative)
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(argv, timeout)
+        rlist, wlist = ([self._fd], []) if readable else ([], [self._stdin_fd])
+        if not any(select.select(rlist, wlist, [], remaining)[:2]):
+            raise subprocess.TimeoutExpired(argv, timeout)
+    
+    def _write(self, buffers, argv, timeout, deadline):
+        # Gather writes straight to the pipe, without buffering or
+        # concatenating the (possibly large) input
+        buffers = [memoryview(b) for b in buffers if b]
+        while buffers:
+            self._wait(False, argv, timeout, deadline)
+            try:
+                written = os.writev(self._stdin_fd, buffers)
+            except BlockingIOError:
+                continue
+            while written:
+                if written >= len(buffers[0]):
+                    written -= len(buffers.pop(0))
+                else:
+                    buffers[0] = buffers[0][written:]
+                    written = 0
+    
+    def _fill(self, argv, timeout, deadline):
+        self._wait(True, argv, timeout, deadline)
+        try:
+            chunk = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        if not chunk:
+            raise RuntimeError("ChordPro worker exited unexpectedly")
+        self._buffer += chunk
+    
+    def _read_line(self, argv, timeout, deadline):
+        while b'\n' not in self._buffer:
+            self._fill(argv, timeout, deadline)
+        line, _, rest = bytes(self._buffer).partition(b'\n')
+        self._buffer = bytearray(rest)
+        return line
+    
+    def _read_exact(self, size, argv, timeout, deadline):
+        while len(self._buffer) < size:
+            self._fill(argv, timeout, deadline)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+class ChordProWorkerPool:
+    """
+    Pool of pre-spawned ChordPro workers.
+    
+    Requests attach to an idle worker instead of paying for a fresh Perl
+    interpreter and ChordPro module load on every conversion. Workers that
+    fail or time out are handed to a supervisor thread that respawns them.
+    """
+    
+    def __init__(self, size, cmd, env=None):
+        self.size = size
+        self.cmd = cmd
+        self.env = env
+        self._idle = queue.Queue()
+        self._dead = queue.Queue()
+        for _ in range(size):
+            self._idle.put(ChordProWorker(cmd, env))
+        self._supervisor = threading.Thread(target=self._supervise, name='chordpro-pool', daemon=True)
+        self._supervisor.start()
+        logger.info("Started ChordPro worker pool with %s worker(s)", size)
+    
+    def run(self, argv, input=b'', timeout=None):
+        # One deadline covers both waiting for a worker and the job itself
+        deadline = None if timeout is None else time.monotonic() + timeout
+        worker = self._acquire(argv, timeout, deadline)
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            self._idle.put(worker)
+            raise subprocess.TimeoutExpired(argv, timeout)
+        
+        try:
+            result = worker.run(argv, input=input, timeout=remaining)
+        except BaseException:
+            # The worker's pipes may be out of sync; replace it
+            self._dead.put(worker)
+            raise
+        self._idle.put(worker)
+        return result
+    
+    def _acquire(self, argv, timeout, deadline):
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                worker = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(argv, timeout)
+            if worker.alive():
+                return worker
+            self._dead.put(worker)
+    
+    def _supervise(self):
+        while True:
+            worker = self._dead.get()
+            worker.close()
+            while True:
+                try:
+                    self._idle.put(ChordProWorker(self.cmd, self.env))
+                    break
+                except OSError as e:
+                    logger.error("Failed to respawn ChordPro worker: %s", e)
+                    time.sleep(1)
+            logger.warning("Respawned ChordPro worker")
+
 class ChordProProcessor:
     """Handles ChordPro CLI operations with extensible configuration."""
     
     def __init__(self):
         self.supported_outputs = ['pdf', 'text', 'cho', 'html']
-        self.base_cmd = ['chordpro']
+        # ChordPro backend (--generate) for each output format
+        self.generators = {
+            'pdf': 'PDF',
+            'text': 'Text',
+            'cho': 'ChordPro',
+            'html': 'HTML'
+        }
+        # Per-format argv templates: read the song from stdin and write the
+        # result to stdout. Without an output file name to take the type
+        # from, the backend is selected explicitly.
+        self.base_cmds = {
+            output_format: (CHORDPRO_BIN, '-', '-o', '-', f"--generate={generator}")
+            for output_format, generator in self.generators.items()
+        }
+        self.pool_size = int(os.getenv('CHORDPRO_POOL_SIZE', '2'))
+        self.scratch_dir = self._get_scratch_dir()
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+    
+    def _get_scratch_dir(self):
+        """Directory for scratch files, ideally on tmpfs (SCRATCH_DIR)."""
+        scratch_dir = os.getenv('SCRATCH_DIR')
+        if scratch_dir and not os.path.isdir(scratch_dir):
+            logger.warning("SCRATCH_DIR %s is not a directory, using default", scratch_dir)
+            scratch_dir = None
+        return scratch_dir or tempfile.gettempdir()
+    
+    def _get_pool(self):
+        """Return this process's worker pool, starting it on first use."""
+        # Pools are per process: gunicorn forks workers after the app is
+        # loaded, and worker pipes must not be shared across processes.
+        if self._pool_pid == os.getpid():
+            return self._pool
+        
+        with self._pool_lock:
+            if self._pool_pid != os.getpid():
+                self._pool = None
+                if self.pool_size > 0 and not (PERL_BIN and is_perl_script(CHORDPRO_BIN)):
+                    logger.warning("%s is not a Perl script, spawning ChordPro per request", CHORDPRO_BIN)
+                elif self.pool_size > 0:
+                    try:
+                        # Workers spool job stdin/stdout in anonymous files under TMPDIR
+                        env = dict(os.environ, TMPDIR=self.scratch_dir)
+                        self._pool = ChordProWorkerPool(self.pool_size, [PERL_BIN, WORKER_SCRIPT, CHORDPRO_BIN], env)
+                    except OSError as e:
+                        logger.error("Failed to start ChordPro worker pool, spawning per request: %s", e)
+                self._pool_pid = os.getpid()
+        return self._pool
+    
+    def _run(self, cmd, input, timeout):
+        """Run a ChordPro command, on the worker pool when available."""
+        pool = self._get_pool()
+        if pool is None:
+            result = run_command(cmd, input=input, capture_output=True, timeout=timeout)
+        else:
+            result = pool.run(cmd[1:], input=input, timeout=timeout)
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(
+                result.returncode, cmd, result.stdout,
+                result.stderr.decode('utf-8', errors='replace')
+            )
+        return result
     
     def process(self, content, output_format='pdf', options=None):
         """
@@ -147,106 +462,77 @@ class ChordProProcessor:
         Args:
             content (str): ChordPro content
             output_format (str): Output format (pdf, text, cho, html)
-            options (dict): Additional CLI options
+            options (ConvertOptions): Additional CLI options
         
         Returns:
-            tuple: (output_path, content_type)
+            tuple: (output_bytes, content_type)
         """
         if output_format not in self.supported_outputs:
             raise ValueError(f"Unsupported output format: {output_format}")
         
-        options = options or {}
-        
-        # Create temporary files
-        input_id = str(uuid.uuid4())
-        input_path = f"/tmp/input_{input_id}.cho"
-        output_path = f"/tmp/output_{input_id}.{output_format}"
+        options = options or DEFAULT_OPTIONS
         
         try:
-            logger.info(f"Processing ChordPro content: format={output_format}, options={options}")
+            logger.info("Processing ChordPro content: format=%s, options=%s", output_format, options)
             
-            # Write input content
-            with open(input_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Build command
-            cmd = self.base_cmd.copy()
-            cmd.extend([input_path, '-o', output_path])
+            # Build command, copying the template only when options are set
+            cmd = self.base_cmds[output_format]
             
             # Add CLI options
-            self._add_options(cmd, options)
+            if options != DEFAULT_OPTIONS:
+                cmd = list(cmd)
+                self._add_options(cmd, options)
             
-            logger.debug(f"Executing command: {' '.join(cmd)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executing command: %s", ' '.join(cmd))
             
             # Execute chordpro with timeout for security
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=30  # 30 second timeout to prevent hanging
-            )
+            result = self._run(cmd, content.encode('utf-8'), timeout=30)  # 30 second timeout to prevent hanging
             
-            if not os.path.exists(output_path):
-                logger.error(f"ChordPro command succeeded but output file not found: {output_path}")
-                raise RuntimeError("ChordPro did not generate output file")
+            if not result.stdout:
+                logger.error("ChordPro command succeeded but generated no output")
+                raise RuntimeError("ChordPro did not generate output")
             
-            file_size = os.path.getsize(output_path)
-            logger.info(f"ChordPro processing completed successfully: {file_size} bytes generated")
+            logger.info("ChordPro processing completed successfully: %s bytes generated", len(result.stdout))
             
-            return output_path, self._get_content_type(output_format)
+            return result.stdout, self._get_content_type(output_format)
             
         except subprocess.TimeoutExpired:
-            logger.error(f"ChordPro processing timed out after 30 seconds")
+            logger.error("ChordPro processing timed out after 30 seconds")
             raise RuntimeError("ChordPro processing timed out")
         except subprocess.CalledProcessError as e:
-            logger.error(f"ChordPro processing failed with return code {e.returncode}: {e.stderr}")
-            # Sanitize error message for security (don't expose file paths)
+            logger.error("ChordPro processing failed with return code %s: %s", e.returncode, e.stderr)
             error_msg = e.stderr.strip() if e.stderr else "Unknown ChordPro error"
-            if input_path in error_msg:
-                error_msg = error_msg.replace(input_path, "<input>")
             raise RuntimeError(f"ChordPro processing failed: {error_msg}")
         except Exception as e:
-            logger.error(f"Unexpected error during ChordPro processing: {str(e)}")
+            logger.error("Unexpected error during ChordPro processing: %s", e)
             raise RuntimeError(f"Processing failed: {str(e)}")
-        finally:
-            # Cleanup input file
-            if os.path.exists(input_path):
-                try:
-                    os.unlink(input_path)
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup input file {input_path}: {e}")
     
     def _add_options(self, cmd, options):
         """Add CLI options to command."""
         # Transpose
-        if 'transpose' in options:
-            cmd.extend(['--transpose', str(options['transpose'])])
+        if options.transpose is not None:
+            cmd.extend(['--transpose', str(options.transpose)])
         
         # Metadata
-        if 'meta' in options:
-            for key, value in options['meta'].items():
+        if options.meta:
+            for key, value in options.meta.items():
                 cmd.extend(['--meta', f"{key}={value}"])
         
         # Configuration files
-        if 'config' in options:
-            config_value = options['config']
-            if isinstance(config_value, str):
+        if options.config is not None:
+            if isinstance(options.config, str):
                 # Handle comma-separated configs like "ukulele,modern3"
-                configs = [c.strip() for c in config_value.split(',')]
-                for config in configs:
-                    cmd.extend(['--config', config])
-            elif isinstance(config_value, list):
-                # Handle list of configs
-                for config in config_value:
-                    cmd.extend(['--config', config])
+                configs = split_configs(options.config)
             else:
-                # Single config (should be string but handle gracefully)
-                cmd.extend(['--config', str(config_value)])
+                # Handle list of configs
+                configs = options.config
+            for config in configs:
+                cmd.extend(['--config', config])
         
         # Diagrams
-        if 'diagrams' in options:
-            if options['diagrams']:
+        if options.diagrams is not None:
+            if options.diagrams:
                 cmd.append('--diagrams')
             else:
                 cmd.append('--no-diagrams')
@@ -263,16 +549,36 @@ class ChordProProcessor:
 
 processor = ChordProProcessor()
 
+# ChordPro version cache: (version or None if unavailable, expiry time)
+VERSION_CACHE_TTL = 60
+_version_cache = (None, 0.0)
+
+def get_chordpro_version():
+    """Get the installed ChordPro version, or None if ChordPro is unavailable.
+    
+    The result is cached for VERSION_CACHE_TTL seconds so health probes and
+    page loads don't spawn a process each time.
+    """
+    global _version_cache
+    version, expires_at = _version_cache
+    now = time.monotonic()
+    if now < expires_at:
+        return version
+    
+    try:
+        result = run_command([CHORDPRO_BIN, '--version'], capture_output=True, text=True, timeout=2)
+        version = result.stdout.strip() if result.returncode == 0 else None
+    except Exception as e:
+        logger.warning("Failed to check ChordPro version: %s", e)
+        version = None
+    
+    _version_cache = (version, now + VERSION_CACHE_TTL)
+    return version
+
 @app.route('/', methods=['GET'])
 def index():
     """API documentation index page."""
-    try:
-        # Get ChordPro version
-        result = subprocess.run(['chordpro', '--version'], capture_output=True, text=True)
-        chordpro_version = result.stdout.strip() if result.returncode == 0 else "unknown"
-    except:
-        chordpro_version = "unknown"
-    
+    chordpro_version = get_chordpro_version() or "unknown"
     return render_template('index.html', chordpro_version=chordpro_version)
 
 @app.route('/health', methods=['GET'])
@@ -281,19 +587,12 @@ def health():
     status = {
         "status": "healthy", 
         "service": "chordpro-api",
-        "timestamp": logging.Formatter().formatTime(logging.LogRecord("", 0, "", 0, "", (), None))
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
     
     # Basic ChordPro availability check
-    try:
-        result = subprocess.run(['chordpro', '--version'], capture_output=True, text=True, timeout=2)
-        if result.returncode == 0:
-            status["chordpro_available"] = True
-        else:
-            status["chordpro_available"] = False
-            status["status"] = "degraded"
-    except Exception:
-        status["chordpro_available"] = False
+    status["chordpro_available"] = get_chordpro_version() is not None
+    if not status["chordpro_available"]:
         status["status"] = "degraded"
     
     return jsonify(status)
@@ -315,75 +614,56 @@ def convert():
         }
     }
     """
-    output_path = None
     try:
-        logger.info(f"Convert request from {request.remote_addr}")
+        logger.info("Convert request from %s", request.remote_addr)
+        
+        if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+            raise BadRequest("Request too large (max 2MB)")
         
-        data = request.get_json()
-        if not data:
+        body = request.get_data(cache=False)
+        if not request.is_json or not body:
             raise BadRequest("JSON body required")
         
-        content = data.get('content')
+        # Parse and validate types in one pass
+        try:
+            data = convert_request_decoder.decode(body)
+        except msgspec.ValidationError as e:
+            raise BadRequest(f"Invalid request: {e}")
+        except msgspec.DecodeError:
+            raise BadRequest("Invalid JSON body")
+        
+        content = data.content
         if not content:
             raise BadRequest("'content' field is required")
         
         # Input validation for security
-        if not isinstance(content, str):
-            raise BadRequest("'content' must be a string")
-        
         if len(content) > 1024 * 1024:  # 1MB limit
             raise BadRequest("Content too large (max 1MB)")
         
-        output_format = data.get('output_format', 'pdf')
-        if not isinstance(output_format, str):
-            raise BadRequest("'output_format' must be a string")
-        
-        options = data.get('options', {})
-        if not isinstance(options, dict):
-            raise BadRequest("'options' must be an object")
-        
-        # Validate options structure
-        for key, value in options.items():
-            if key == 'transpose' and not isinstance(value, int):
-                raise BadRequest("'transpose' option must be an integer")
-            elif key == 'meta' and not isinstance(value, dict):
-                raise BadRequest("'meta' option must be an object")
-            elif key == 'diagrams' and not isinstance(value, bool):
-                raise BadRequest("'diagrams' option must be a boolean")
-            elif key == 'config' and not isinstance(value, (str, list)):
-                raise BadRequest("'config' option must be a string or array")
+        output_format = data.output_format
         
         # Process the content
-        output_path, content_type = processor.process(content, output_format, options)
+        output, content_type = processor.process(content, output_format, data.options)
         
         # Return the file
-        response = send_file(
-            output_path,
+        response = Response(
+            output,
             mimetype=content_type,
-            as_attachment=True,
-            download_name=f"output.{output_format}",
-            conditional=False
+            headers={'Content-Disposition': f"attachment; filename=output.{output_format}"}
         )
         
-        logger.info(f"Convert request completed successfully: {output_format} format")
+        logger.info("Convert request completed successfully: %s format", output_format)
         return response
         
-    except BadRequest as e:
-        logger.warning(f"Bad request from {request.remote_addr}: {str(e)}")
+    except (BadRequest, RequestEntityTooLarge) as e:
+        logger.warning("Bad request from %s: %s", request.remote_addr, e)
         raise
     except RuntimeError as e:
-        logger.error(f"Processing error for {request.remote_addr}: {str(e)}")
+        logger.error("Processing error for %s: %s", request.remote_addr, e)
         raise InternalServerError(str(e))
     except Exception as e:
-        logger.error(f"Unexpected error processing request from {request.remote_addr}: {str(e)}")
+        logger.error("Unexpected error processing request from %s: %s", request.remote_addr, e)
         raise InternalServerError("Processing failed")
-    finally:
-        # Cleanup output file if it exists
-        if output_path and os.path.exists(output_path):
-            try:
-                os.unlink(output_path)
-            except Exception as e:
-                logger.warning(f"Failed to cleanup output file {output_path}: {e}")
 
 @app.route('/formats', methods=['GET'])
 @require_api_key
@@ -422,18 +702,15 @@ def get_options():
 
 if __name__ == '__main__':
     logger.info("Starting ChordPro Web API")
-    logger.info(f"Python version: {sys.version}")
-    logger.info(f"Flask version: {getattr(app, '__version__', 'unknown')}")
+    logger.info("Python version: %s", sys.version)
+    logger.info("Flask version: %s", getattr(app, '__version__', 'unknown'))
     
     # Check ChordPro installation
-    try:
-        result = subprocess.run(['chordpro', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            logger.info(f"ChordPro version: {result.stdout.strip()}")
-        else:
-            logger.error("ChordPro not properly installed or accessible")
-    except Exception as e:
-        logger.error(f"Failed to check ChordPro version: {e}")
+    chordpro_version = get_chordpro_version()
+    if chordpro_version:
+        logger.info("ChordPro version: %s", chordpro_version)
+    else:
+        logger.error("ChordPro not properly installed or accessible")
     
     logger.info("Server starting on http://0.0.0.0:8080")
     logger.info("Ready to accept requests")
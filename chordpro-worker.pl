@@ -0,0 +1,125 @@
+#!/usr/bin/perl
+
+# Long-running ChordPro worker used by the Web API process pool.
+#
+# Usage: chordpro-worker.pl /usr/bin/chordpro
+#
+# The ChordPro modules are compiled once at startup. Each job then runs in a
+# forked child, so every conversion starts from a clean interpreter state
+# without paying for Perl startup and module loading again.
+#
+# Job stdin, stdout and stderr are spooled in anonymous temporary files
+# (unlinked on creation, so nothing is left behind) under $TMPDIR, which the
+# API points at a tmpfs scratch directory.
+#
+# Protocol (stdin/stdout, one job at a time):
+#   request:  {"argv": [...], "input": N}\n followed by N bytes of stdin data
+#   response: {"rc": R, "stdout": N, "stderr": M}\n followed by N + M bytes
+
+use strict;
+use warnings;
+use JSON::PP;
+use File::Temp qw(tempfile);
+use POSIX qw(_exit);
+
+my $script = shift @ARGV or die "usage: $0 CHORDPRO\n";
+-f $script or die "$0: $script not found\n";
+
+# Preload whatever ChordPro modules this installation provides.
+for my $module (qw(ChordPro ChordPro::Output::PDF
+                   App::Music::ChordPro App::Music::ChordPro::Output::PDF)) {
+    eval "require $module; 1";
+}
+
+my $json = JSON::PP->new->utf8;
+my $child = 0;
+my $in_child = 0;
+
+# The spool files live on a small shared tmpfs, so a full disk must fail the
+# job rather than return truncated output. This also runs when chordpro
+# calls exit itself.
+END {
+    if ( $in_child && defined fileno(STDOUT) ) {
+        close(STDOUT) or _exit(255);
+    }
+}
+
+$SIG{TERM} = sub {
+    kill 'KILL', $child if $child;
+    _exit(1);
+};
+
+binmode STDIN;
+binmode STDOUT;
+STDOUT->autoflush(1);
+
+sub read_exact {
+    my ( $fh, $length ) = @_;
+    my $data = '';
+    while ( length($data) < $length ) {
+        my $n = read( $fh, $data, $length - length($data), length($data) );
+        die "short read\n" unless $n;
+    }
+    return $data;
+}
+
+sub slurp {
+    my ($fh) = @_;
+    seek( $fh, 0, 0 );
+    local $/;
+    my $data = <$fh>;
+    return defined $data ? $data : '';
+}
+
+sub reply {
+    my ( $rc, $out, $err ) = @_;
+    print STDOUT $json->encode(
+        { rc => $rc, stdout => length($out), stderr => length($err) } ),
+      "\n", $out, $err;
+}
+
+while ( defined( my $line = <STDIN> ) ) {
+    my $job = eval { $json->decode($line) };
+    unless ( $job && ref $job->{argv} eq 'ARRAY' ) {
+        # The stream is out of sync; let the pool replace this worker.
+        reply( 255, '', "chordpro-worker: malformed job\n" );
+        exit 1;
+    }
+
+    my $in  = tempfile();
+    my $out = tempfile();
+    my $err = tempfile();
+    binmode $_ for $in, $out, $err;
+    my $input = read_exact( \*STDIN, $job->{input} || 0 );
+    unless ( ( print $in $input ) && $in->flush && seek( $in, 0, 0 ) ) {
+        reply( 255, '', "chordpro-worker: failed to spool input: $!\n" );
+        close($in);
+        next;
+    }
+
+    $child = fork;
+    unless ( defined $child ) {
+        reply( 255, '', "chordpro-worker: fork failed: $!\n" );
+        next;
+    }
+
+    if ( $child == 0 ) {
+        $SIG{TERM} = 'DEFAULT';
+        $in_child = 1;
+        open( STDIN,  '<&', $in )  or _exit(255);
+        open( STDOUT, '>&', $out ) or _exit(255);
+        open( STDERR, '>&', $err ) or _exit(255);
+        $0    = $script;
+        # Pass arguments as UTF-8 octets, like a real exec of chordpro
+        @ARGV = map { my $arg = $_; utf8::encode($arg); $arg } @{ $job->{argv} };
+        do $script;
+        print STDERR $@ if $@;
+        exit( $@ ? 255 : 0 );
+    }
+
+    waitpid( $child, 0 );
+    my $status = $?;
+    $child = 0;
+    my $rc = $status & 127 ? 128 + ( $status & 127 ) : $status >> 8;
+    reply( $rc, slurp($out), slurp($err) );
+}
@@ -1,13 +1,22 @@
 # Gunicorn configuration for production deployment
+import os
+
 bind = "0.0.0.0:8080"
-workers = 2
-worker_class = "sync"
+# CPUs this container may run on (respects cpusets, unlike cpu_count()).
+# Each worker also starts CHORDPRO_POOL_SIZE ChordPro processes, so
+# WEB_CONCURRENCY can cap the worker count.
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * len(os.sched_getaffinity(0)) + 1))
+# gevent workers yield while a request waits on ChordPro, so concurrency is
+# bounded by worker_connections and the ChordPro pool rather than threads
+worker_class = "gevent"
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
-timeout = 30
-keepalive = 2
-preload_app = True
+timeout = 60
+keepalive = 30
+# Load the app after gevent has monkey-patched each worker, so locks,
+# queues and pipes used by the ChordPro pool are all cooperative
+preload_app = False
 
 # Logging
 accesslog = "-"
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stand-in for chordpro: echoes stdin back on stdout
+STUB_CHORDPRO = """\
+#!/usr/bin/perl
+binmode STDIN;
+binmode STDOUT;
+local $/;
+print <STDIN>;
+"""
+
+# Runs in a child interpreter so monkey-patching doesn't leak into other tests
+GEVENT_SCRIPT = textwrap.dedent("""\
+    from gevent import monkey
+    monkey.patch_all()
+
+    import os
+    import sys
+    os.environ['DEVELOPMENT_MODE'] = 'true'
+    sys.path.insert(0, {root!r})
+    import app
+
+    pool = app.ChordProWorkerPool(1, [app.PERL_BIN, app.WORKER_SCRIPT, {stub!r}])
+    for size in (200 * 1024, 1024 * 1024):
+        content = os.urandom(size)
+        result = pool.run(['-', '-o', '-'], input=content, timeout=30)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == content, (size, len(result.stdout))
+    print('ok')
+""")
+
+
+def _importable(*modules):
+    for module in modules:
+        try:
+            __import__(module)
+        except ImportError:
+            return False
+    return True
+
+
+@unittest.skipUnless(_importable('gevent', 'flask', 'msgspec'), "requires gevent, flask and msgspec")
+class WorkerPoolGeventTest(unittest.TestCase):
+
+    def test_large_input_with_gevent(self):
+        """Inputs larger than the pipe buffer survive gevent's non-blocking pipes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            stub = os.path.join(tmp, 'chordpro')
+            with open(stub, 'w') as f:
+                f.write(STUB_CHORDPRO)
+            os.chmod(stub, 0o755)
+
+            script = GEVENT_SCRIPT.format(root=ROOT, stub=stub)
+            result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=120)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.strip().splitlines()[-1], 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()